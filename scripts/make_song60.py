@@ -1,6 +1,6 @@
 from pathlib import Path
 from freqai.inference.song_v0 import generate_song_v0
-from freqai.inference.groove_imposer import extract_groove_template, impose_groove_on_events
+from freqai.inference.groove_imposer import extract_groove_template, impose_groove_on_parts
 from freqai.export.stems import export_stems_and_mix
 from freqai.export.midi_export import write_multitrack_midi
 
@@ -13,8 +13,7 @@ parts = generate_song_v0(anchor, key=key, mode=mode, length_sec=length_sec, bpm=
 # optional groove
 try:
     tpl = extract_groove_template("demo_anchor.mid", "1/16")
-    for k in list(parts.keys()):
-        parts[k] = impose_groove_on_events(parts[k], bpm=bpm, template=tpl, max_ms=12)
+    parts = impose_groove_on_parts(parts, bpm=bpm, template=tpl, max_ms=12)
 except Exception as e:
     print("Skipping groove:", e)
 
@@ -0,0 +1,5 @@
+"""Allow `python -m freqai ...` as an alias for the `freqai` console script."""
+from .cli import main
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,34 @@
 import re
 import json
-import csv
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from math import ceil
 from pathlib import Path
-from typing import List, Tuple, Optional, Dict, Any
+from typing import Callable, List, Tuple, Optional, Dict, Any, Union
 
 import click
+from click.core import ParameterSource
 from rich.console import Console
-from rich.table import Table
 
-# Generators & processors
-from .inference.song_v0 import generate_song_v0
-from .inference.motif_v0 import apply_motif_repetition
-from .inference.arrange_v0 import apply_arrangement
-from .inference.groove_imposer import extract_groove_template, impose_groove_on_events
-from .inference.voiceleading_v0 import improve_voice_leading
-
-# Exports / rendering
-from .export.midi_export import write_melody_midi, write_multitrack_midi
-from .synthesis.renderer import write_wav_from_events
-from .export.stems import export_stems_and_mix
+# Generators, processors and exporters are imported lazily inside
+# cmd_generate so `--help` and plan/CSV-only runs skip pretty_midi/numpy.
 
 # Config support
 from .config import load_yaml_config, deep_merge
 
+# Optional fast JSON (falls back to stdlib json)
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
 console = Console()
 
 # --- Canonical keys & modes ---
-KEYS = {
+KEYS = frozenset({
     "C","C#","Db","D","D#","Eb","E","F","F#","Gb","G","G#","Ab","A","A#","Bb","B"
-}
+})
 MODE_ALIASES = {
     "ionian": "ionian", "major": "ionian",
     "dorian": "dorian",
@@ -39,10 +38,41 @@ MODE_ALIASES = {
     "aeolian": "aeolian", "minor": "aeolian",
     "locrian": "locrian",
 }
-QUANTIZE_ALLOWED = {"1/4","1/8","1/12","1/16","1/24","1/32"}
+QUANTIZE_ALLOWED = frozenset({"1/4","1/8","1/12","1/16","1/24","1/32"})
+
+def _key_spellings() -> Dict[str, str]:
+    """Every accepted spelling of each key (any-case letter, ASCII or Unicode accidental)."""
+    out: Dict[str, str] = {}
+    for k in KEYS:
+        letters = (k[0], k[0].lower())
+        if len(k) == 1:
+            for l in letters:
+                out[l] = k
+        else:
+            accs = (k[1], "♯") if k[1] == "#" else (k[1], "♭")
+            for l in letters:
+                for a in accs:
+                    out[l + a] = k
+    return out
+
+_KEY_CANON = _key_spellings()
+
+# --- Precompiled parser patterns ---
+_RE_ANCHOR_SPLIT = re.compile(r"[,\-\s]+")
+# One pass over every accepted duration form: 60, 60s, 1m30s / 1m, 1:00
+_RE_DURATION = re.compile(
+    r"(?P<sec>\d+)s?"
+    r"|(?P<min>\d+)m(?:(?P<min_sec>\d+)s)?"
+    r"|(?P<clk_min>\d+):(?P<clk_sec>[0-5]\d)"
+)
 
 def _canon_key(k: str) -> str:
-    k = k.strip().replace("♯","#").replace("♭","b")
+    k = k.strip()
+    hit = _KEY_CANON.get(k)
+    if hit is not None:
+        return hit
+    # Slow path for anything not pre-spelled (keeps the historical leniency)
+    k = k.replace("♯","#").replace("♭","b")
     if len(k) >= 2 and k[1] in {"b","#"}:
         k = k[0].upper() + k[1]
     else:
@@ -59,33 +89,44 @@ def _canon_mode(m: str) -> str:
         )
     return MODE_ALIASES[m]
 
-def _parse_instruments(s: Optional[str]) -> List[str]:
+def _parse_instruments(s: Optional[Union[str, List[str]]]) -> List[str]:
     if not s:
         return []
-    items = [x.strip() for x in s.split(",") if x.strip()]
+    if isinstance(s, (list, tuple)):
+        # YAML list form: already split, just clean up
+        items = [str(x).strip() for x in s if str(x).strip()]
+    else:
+        items = [x.strip() for x in str(s).split(",") if x.strip()]
     if len(items) > 4:
         raise click.BadParameter("Please specify at most 4 instruments (comma-separated).")
     return items
 
-def _parse_anchor(s: Optional[str]) -> List[str]:
+def _parse_anchor(s: Optional[Union[str, List[str]]]) -> List[str]:
     if not s:
         return []
-    parts = re.split(r"[,\-\s]+", s.strip())
+    if isinstance(s, (list, tuple)):
+        # YAML list form: already split, just clean up
+        return [str(x).strip() for x in s if str(x).strip()]
+    parts = _RE_ANCHOR_SPLIT.split(str(s).strip())
     return [p for p in parts if p]
 
+@lru_cache(maxsize=256)
+def _duration_sec(s: str) -> Optional[int]:
+    """Seconds for 60, 60s, 1m30s, 1:00 or 00:45; None if unrecognized."""
+    m = _RE_DURATION.fullmatch(s.strip().lower())
+    if m is None:
+        return None
+    if m["sec"] is not None:
+        return int(m["sec"])
+    if m["min"] is not None:
+        return int(m["min"]) * 60 + int(m["min_sec"] or 0)
+    return int(m["clk_min"]) * 60 + int(m["clk_sec"])
+
 def _parse_duration(s: str) -> int:
-    s = s.strip().lower()
-    if re.fullmatch(r"\d+", s):
-        return int(s)
-    if s.endswith("s") and s[:-1].isdigit():
-        return int(s[:-1])
-    m = re.fullmatch(r"(\d+)m(?:(\d+)s)?", s)
-    if m:
-        return int(m.group(1)) * 60 + int(m.group(2) or 0)
-    m = re.fullmatch(r"(\d+):([0-5]\d)", s)
-    if m:
-        return int(m.group(1)) * 60 + int(m.group(2))
-    raise click.BadParameter("Length must look like 60, 60s, 1m30s, 1:00, or 00:45")
+    t = _duration_sec(s)
+    if t is None:
+        raise click.BadParameter("Length must look like 60, 60s, 1m30s, 1:00, or 00:45")
+    return t
 
 def _parse_markers(markers: Tuple[str, ...]) -> List[Tuple[int, str]]:
     out = []
@@ -94,21 +135,34 @@ def _parse_markers(markers: Tuple[str, ...]) -> List[Tuple[int, str]]:
             raise click.BadParameter(f"Marker '{m}' must be 'time:label' (e.g., 30:motif or 00:45:motif)")
         # last colon so 00:30 works
         time_str, label = m.rsplit(":", 1)
-        time_str, label = time_str.strip().lower(), label.strip()
-        if time_str.endswith("s") or re.fullmatch(r"\d+:\d{2}", time_str) or time_str.isdigit():
-            t = _parse_duration(time_str)
-        else:
+        t = _duration_sec(time_str)
+        if t is None:
             raise click.BadParameter(f"Bad time format in marker '{m}'")
-        out.append((t, label))
+        out.append((t, label.strip()))
     out.sort(key=lambda x: x[0])
     return out
 
+def _dumps(obj: Any) -> str:
+    """Pretty JSON (2-space indent) via orjson when installed, else stdlib json."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
+
+def _status(head: str, tail: str = "", color: str = "") -> None:
+    """Status line: Rich-styled `head` on a terminal, plain print() otherwise (no markup parsing)."""
+    if console.is_terminal:
+        console.print(f"[{color}]{head}[/{color}]{tail}" if color else head + tail)
+    else:
+        print(head + tail)
+
+@lru_cache(maxsize=None)
 def _sec_to_mss(t: int) -> str:
     return f"{t//60:02d}:{t%60:02d}"
 
-def _propose_sections(total_sec: int) -> List[Dict[str, int]]:
+@lru_cache(maxsize=64)
+def _section_bounds(total_sec: int) -> Tuple[Tuple[str, int, int], ...]:
     if total_sec < 20:
-        return [{"name":"A","start":0,"end":total_sec}]
+        return (("A", 0, total_sec),)
     cuts = [0,
             round(total_sec*0.10),
             round(total_sec*0.45),
@@ -120,8 +174,12 @@ def _propose_sections(total_sec: int) -> List[Dict[str, int]]:
     for i in range(len(names)):
         s, e = cuts[i], cuts[i+1]
         if e - s > 0:
-            sections.append({"name": names[i], "start": s, "end": e})
-    return sections
+            sections.append((names[i], s, e))
+    return tuple(sections)
+
+def _propose_sections(total_sec: int) -> List[Dict[str, int]]:
+    # Cached bounds are immutable; hand callers fresh dicts they may edit
+    return [{"name": n, "start": s, "end": e} for n, s, e in _section_bounds(total_sec)]
 
 @click.group()
 def main():
@@ -170,22 +228,36 @@ def cmd_generate(
 ):
     """Plan and export: full-song (tiled from anchor) + voiceleading + motif + arrangement + optional groove → MIDI/WAV/CSV/STEMS."""
 
-    # Load config and merge with CLI (CLI wins)
+    # Load config and merge with CLI (CLI wins). Only flags the user actually
+    # passed override the config; Click defaults no longer mask preset values.
     cfg = load_yaml_config(config)
-    cli_args: Dict[str, Any] = {
-        "key": key, "mode": mode, "bpm": bpm,
-        "anchor": anchor, "anchor_bars": anchor_bars, "groove": str(groove) if groove else None,
-        "quantize": quantize, "humanize": humanize, "instruments": instruments,
-        "length": length, "marker": list(marker) if marker else None,
-        "voicelead": voicelead, "voicelead_melody": voicelead_melody,
-        "motif": motif, "motif_bars": motif_bars, "arrange": arrange,
-        "drums": drums, "stems": stems, "midi": midi, "wav": wav, "csv_structure": csv_structure,
-        "outdir": outdir, "outfile": outfile,
-        "waveform": waveform, "sr": sr, "gain": gain,
-    }
-    cli_args = {k: v for k, v in cli_args.items() if v is not None and v != ""}
-    args = deep_merge(cfg, cli_args)
-
+    ctx = click.get_current_context()
+    cli_args: Dict[str, Any] = {}
+    for name, value in ctx.params.items():
+        if name == "config" or value is None or value == "" or value == ():
+            continue
+        if ctx.get_parameter_source(name) is ParameterSource.DEFAULT:
+            continue
+        if name == "groove":
+            value = str(value)
+        elif name == "marker":
+            value = list(value)
+        cli_args[name] = value
+    args = deep_merge(cfg, cli_args) if cli_args else cfg
+    _run_generate(args)
+
+@main.command("batch")
+@click.argument("configs", nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False, path_type=Path))
+def cmd_batch(configs):
+    """Run `generate` for each YAML preset in one process (imports and caches are paid once)."""
+    for cfg_path in configs:
+        if console.is_terminal:
+            console.rule(f"[bold]{cfg_path}")
+        _run_generate(load_yaml_config(cfg_path))
+
+def _run_generate(args: Dict[str, Any]) -> None:
+    """Body of `generate` for already-merged settings (config + CLI overrides)."""
     # Required
     for req in ("key","mode","bpm","length"):
         if req not in args:
@@ -196,9 +268,9 @@ def cmd_generate(
     bpm = int(args["bpm"])
     total_sec = _parse_duration(str(args["length"]))
 
-    anchor_chords = _parse_anchor(str(args.get("anchor", "")))
+    anchor_chords = _parse_anchor(args.get("anchor", ""))
     anchor_bars = int(args.get("anchor_bars", 4))
-    instruments = _parse_instruments(str(args.get("instruments", "")))
+    instruments = _parse_instruments(args.get("instruments", ""))
 
     groove_path = args.get("groove", None)
     quantize = str(args.get("quantize", "1/16"))
@@ -260,52 +332,68 @@ def cmd_generate(
         ]
     }
 
-    # Pretty tables
-    table = Table(title="Planned Sections", show_lines=False)
-    table.add_column("Section", no_wrap=True)
-    table.add_column("Start", justify="right")
-    table.add_column("End", justify="right")
-    for s in plan["structure"]:
-        table.add_row(s["name"], _sec_to_mss(s["start"]), _sec_to_mss(s["end"]))
-    console.print(table)
-
-    if markers:
-        mtab = Table(title="Markers", show_lines=False)
-        mtab.add_column("Time"); mtab.add_column("Label")
+    # Pretty tables on a terminal; plain CSV lines when piped (skips Rich layout)
+    if console.is_terminal:
+        from rich.table import Table
+
+        table = Table(title="Planned Sections", show_lines=False)
+        table.add_column("Section", no_wrap=True)
+        table.add_column("Start", justify="right")
+        table.add_column("End", justify="right")
+        for s in plan["structure"]:
+            table.add_row(s["name"], _sec_to_mss(s["start"]), _sec_to_mss(s["end"]))
+        console.print(table)
+
+        if markers:
+            mtab = Table(title="Markers", show_lines=False)
+            mtab.add_column("Time"); mtab.add_column("Label")
+            for t, lab in markers:
+                mtab.add_row(_sec_to_mss(t), lab)
+            console.print(mtab)
+    else:
+        for s in plan["structure"]:
+            print(f"{s['name']},{s['start']},{s['end']}")
         for t, lab in markers:
-            mtab.add_row(_sec_to_mss(t), lab)
-        console.print(mtab)
+            print(f"{t},{lab}")
 
     # Ensure out dir
     outdir_path = Path(outdir)
-    outdir_path.mkdir(parents=True, exist_ok=True)
+    if not outdir_path.is_dir():
+        outdir_path.mkdir(parents=True, exist_ok=True)
 
     # CSV structure (optional)
     if csv_structure:
         base = outfile or "structure"
         csv_path = outdir_path / f"{base}.csv"
-        with csv_path.open("w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["section","start_m:ss","end_m:ss","start_sec","end_sec"])
-            for s in plan["structure"]:
-                writer.writerow([s["name"], _sec_to_mss(s["start"]), _sec_to_mss(s["end"]), s["start"], s["end"]])
-        console.print(f"[green]Wrote[/green] CSV structure → {csv_path}")
+        # Fixed, comma-free columns: build the body directly (same \r\n rows csv.writer emits)
+        rows = ["section,start_m:ss,end_m:ss,start_sec,end_sec\r\n"]
+        rows.extend(
+            f"{s['name']},{_sec_to_mss(s['start'])},{_sec_to_mss(s['end'])},{s['start']},{s['end']}\r\n"
+            for s in plan["structure"]
+        )
+        csv_path.write_text("".join(rows), encoding="utf-8", newline="")
+        _status("Wrote", f" CSV structure → {csv_path}", "green")
 
     # === Generate FULL-SONG parts ===
     if not anchor_chords:
-        console.print("[yellow]No --anchor provided; nothing to render/export.[/yellow]")
+        _status("No --anchor provided; nothing to render/export.", color="yellow")
         return
 
+    from .inference.song_v0 import generate_song_v0
+
     parts = generate_song_v0(
         anchor_chords, key=key, mode=mode, length_sec=total_sec, bpm=bpm, include_drums=drums
     )
 
     # Voice-leading before motif/arrangement/groove
     if voicelead and anchor_chords:
+        from .inference.voiceleading_v0 import improve_voice_leading
+
         beats_per_bar = 4
         spb = 60.0 / float(bpm)
         bars_total = int(ceil(float(total_sec) / (spb * beats_per_bar)))
-        tiled_anchor = [anchor_chords[i % len(anchor_chords)] for i in range(bars_total)]
+        reps = -(-bars_total // len(anchor_chords))
+        tiled_anchor = (anchor_chords * reps)[:bars_total]
         parts = improve_voice_leading(
             parts=parts,
             anchor=tiled_anchor,
@@ -314,10 +402,12 @@ def cmd_generate(
             beats_per_bar=beats_per_bar,
             adjust_melody_on_strong_beats=voicelead_melody,
         )
-        console.print(f"[cyan]Applied voice-leading[/cyan] (bass{' + melody' if voicelead_melody else ''}).")
+        _status("Applied voice-leading", f" (bass{' + melody' if voicelead_melody else ''}).", "cyan")
 
     # Motif repetition (before groove)
     if motif:
+        from .inference.motif_v0 import apply_motif_repetition
+
         parts = apply_motif_repetition(
             parts=parts,
             bpm=bpm,
@@ -326,68 +416,96 @@ def cmd_generate(
             motif_bars=motif_bars,
             beats_per_bar=4,
         )
-        console.print("[cyan]Applied motif repetition[/cyan] across Chorus sections.")
+        _status("Applied motif repetition", " across Chorus sections.", "cyan")
 
     # Arrangement polish (before groove)
     if arrange:
+        from .inference.arrange_v0 import apply_arrangement
+
         parts = apply_arrangement(parts, bpm=bpm, sections=plan["structure"])
-        console.print("[cyan]Applied arrangement[/cyan] (fills + section dynamics).")
+        _status("Applied arrangement", " (fills + section dynamics).", "cyan")
 
     # Apply groove last (humanize micro-timing)
     if groove_path:
+        from .inference.groove_imposer import extract_groove_template, impose_groove_on_parts
+
         tpl = extract_groove_template(str(groove_path), quantize=quantize)
-        for name, evs in list(parts.items()):
-            parts[name] = impose_groove_on_events(evs, bpm=bpm, template=tpl, max_ms=humanize)
-        console.print(f"[cyan]Applied groove from[/cyan] {groove_path} [cyan]({quantize}, ±{humanize}ms)[/cyan]")
+        parts = impose_groove_on_parts(parts, bpm=bpm, template=tpl, max_ms=humanize)
+        _status("Applied groove from", f" {groove_path} ({quantize}, ±{humanize}ms)", "cyan")
 
-    # Flattened events for single-track outputs
-    events = [e for p in parts.values() for e in p]
+    # Flattened events for single-track outputs (skipped for stems-only runs)
+    events = list(chain.from_iterable(parts.values())) if (midi or wav) else []
+
+    # Exports are independent (separate files, read-only parts/events), so the
+    # enabled ones run concurrently; messages are printed afterwards in order.
+    base = outfile or "demo"
+    jobs: List[Callable[[], List[Tuple[str, str, str]]]] = []
 
     # MIDI export (single-track + multitrack)
     if midi:
-        base = outfile or "demo"
-        midi_path = outdir_path / f"{base}.mid"
-        write_melody_midi(events, bpm=bpm, out_path=str(midi_path),
-                          instrument_name="song_v0_allparts", program=0)
-        console.print(f"[green]Wrote[/green] MIDI (single-track) → {midi_path}")
-
-        parts_mid_path = outdir_path / f"{base}.parts.mid"
-        write_multitrack_midi(parts, bpm=bpm, out_path=str(parts_mid_path),
-                              programs={"melody": 73, "bass": 34},
-                              drum_flags={"drums": True})
-        console.print(f"[green]Wrote[/green] MIDI (multitrack) → {parts_mid_path}")
+        from .export.midi_export import write_melody_midi, write_multitrack_midi_fast
+
+        def _export_midi() -> List[Tuple[str, str, str]]:
+            midi_path = outdir_path / f"{base}.mid"
+            write_melody_midi(events, bpm=bpm, out_path=str(midi_path),
+                              instrument_name="song_v0_allparts", program=0)
+            parts_mid_path = outdir_path / f"{base}.parts.mid"
+            write_multitrack_midi_fast(parts, bpm=bpm, out_path=str(parts_mid_path),
+                                       programs={"melody": 73, "bass": 34},
+                                       drum_flags={"drums": True})
+            return [("Wrote", f" MIDI (single-track) → {midi_path}", "green"),
+                    ("Wrote", f" MIDI (multitrack) → {parts_mid_path}", "green")]
+        jobs.append(_export_midi)
 
     # WAV export (single-track quick render)
     if wav:
-        base = outfile or "demo"
-        wav_path = outdir_path / f"{base}.wav"
-        write_wav_from_events(events, bpm=bpm, out_path=str(wav_path), sr=sr, wave=waveform, gain=gain)
-        console.print(f"[green]Wrote[/green] WAV ({waveform}, {sr} Hz) → {wav_path}")
+        from .synthesis.renderer import write_wav_from_events
+
+        def _export_wav() -> List[Tuple[str, str, str]]:
+            wav_path = outdir_path / f"{base}.wav"
+            write_wav_from_events(events, bpm=bpm, out_path=str(wav_path), sr=sr, wave=waveform, gain=gain)
+            return [("Wrote", f" WAV ({waveform}, {sr} Hz) → {wav_path}", "green")]
+        jobs.append(_export_wav)
 
     # STEMS export + stereo mixdown
     if stems:
-        base = outfile or "demo"
-        render_opts = {
-            "sr": sr,
-            "defaults": {"wave": waveform, "gain": gain, "pan": 0.5},
-            "per_part": {
-                "melody": {"wave": "triangle", "gain": max(gain*1.0, 0.18), "pan": 0.65},
-                "bass":   {"wave": "saw",      "gain": max(gain*1.2, 0.24), "pan": 0.35},
-                "drums":  {"wave": "noise",    "gain": max(gain*0.7, 0.12), "pan": 0.50},
-            },
-        }
-        result = export_stems_and_mix(parts, bpm=bpm, outdir=outdir_path, base=base, render_opts=render_opts)
-        console.print(f"[green]Wrote[/green] stems & mix → {result['mix']}")
-        for k, v in result.items():
-            if k.startswith("stem_"):
-                console.print(f"  - {k.replace('stem_','')}: {v}")
+        from .export.stems import export_stems_and_mix
+
+        def _export_stems() -> List[Tuple[str, str, str]]:
+            render_opts = {
+                "sr": sr,
+                "defaults": {"wave": waveform, "gain": gain, "pan": 0.5},
+                "per_part": {
+                    "melody": {"wave": "triangle", "gain": max(gain*1.0, 0.18), "pan": 0.65},
+                    "bass":   {"wave": "saw",      "gain": max(gain*1.2, 0.24), "pan": 0.35},
+                    "drums":  {"wave": "noise",    "gain": max(gain*0.7, 0.12), "pan": 0.50},
+                },
+            }
+            result = export_stems_and_mix(parts, bpm=bpm, outdir=outdir_path, base=base, render_opts=render_opts)
+            msgs = [("Wrote", f" stems & mix → {result['mix']}", "green")]
+            for k, v in result.items():
+                if k.startswith("stem_"):
+                    msgs.append((f"  - {k.replace('stem_','')}: {v}", "", ""))
+            return msgs
+        jobs.append(_export_stems)
+
+    if len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=len(jobs)) as ex:
+            futures = [ex.submit(job) for job in jobs]
+            outputs = [f.result() for f in futures]
+    else:
+        outputs = [job() for job in jobs]
+    for msgs in outputs:
+        for msg in msgs:
+            _status(*msg)
 
     # Summary
-    console.rule("[bold]Controls")
-    print(json.dumps(plan["controls"], indent=2))
-    console.rule("[bold]Next steps")
-    for n in plan["notes"]:
-        print(f"- {n}")
+    if console.is_terminal:
+        console.rule("[bold]Controls")
+    print(_dumps(plan["controls"]))
+    if console.is_terminal:
+        console.rule("[bold]Next steps")
+    print("\n".join(f"- {n}" for n in plan["notes"]))
 
 if __name__ == "__main__":
     main()
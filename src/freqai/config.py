@@ -3,11 +3,17 @@ Simple YAML config loader + deep-merge for Frequency AI (M0).
 We'll wire this into the CLI next so you can do: --config my_preset.yaml
 """
 from __future__ import annotations
-from typing import Any, Dict, Mapping
+from typing import Any, Dict, Mapping, Tuple
 from pathlib import Path
 import os
 import yaml
 
+# libyaml-backed loader when PyYAML was built with it (much faster), else pure Python
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed configs keyed by (resolved path, mtime); edited files are re-read
+_YAML_CACHE: Dict[Tuple[str, float], Dict[str, Any]] = {}
+
 ALLOWED_TOP_LEVEL = {
     "key", "mode", "bpm", "anchor", "anchor_bars",
     "groove", "quantize", "humanize", "instruments",
@@ -31,25 +37,38 @@ def load_yaml_config(path: Path | str | None) -> Dict[str, Any]:
     if not cfg_path:
         return {}
 
-    if not cfg_path.exists():
-        raise FileNotFoundError(f"Config not found: {cfg_path}")
+    try:
+        mtime = cfg_path.stat().st_mtime
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Config not found: {cfg_path}") from None
 
-    with cfg_path.open("r", encoding="utf-8") as f:
-        data = yaml.safe_load(f) or {}
+    cache_key = (str(cfg_path.resolve()), mtime)
+    clean = _YAML_CACHE.get(cache_key)
+    if clean is None:
+        with cfg_path.open("r", encoding="utf-8") as f:
+            data = yaml.load(f, Loader=_SafeLoader) or {}
 
-    # Keep only known keys (avoid surprises)
-    clean = {k: v for k, v in data.items() if k in ALLOWED_TOP_LEVEL}
-    return clean
+        # Keep only known keys (avoid surprises)
+        clean = {k: v for k, v in data.items() if k in ALLOWED_TOP_LEVEL}
+        _YAML_CACHE[cache_key] = clean
+    return dict(clean)
 
 def deep_merge(a: Mapping[str, Any], b: Mapping[str, Any]) -> Dict[str, Any]:
     """
     Shallow-merge by default; recursively merge nested dicts.
     Values in `b` (override) take precedence over `a` (base).
+    Only plain dicts are merged (exact class check); each level is copied once.
     """
+    # Nothing to merge on one side (e.g. no config file): plain copy
+    if not a:
+        return dict(b)
+    if not b:
+        return dict(a)
     out: Dict[str, Any] = dict(a)
     for k, v in b.items():
-        if k in out and isinstance(out[k], dict) and isinstance(v, dict):
-            out[k] = deep_merge(out[k], v)
+        cur = out.get(k)
+        if v.__class__ is dict and cur.__class__ is dict:
+            out[k] = deep_merge(cur, v)
         else:
             out[k] = v
-    return out
\ No newline at end of file
+    return out
@@ -4,6 +4,7 @@ MIDI export utilities for Frequency AI.
 
 - write_melody_midi(events, bpm, out_path, instrument_name="melody", program=0)
 - write_multitrack_midi(parts, bpm, out_path, programs=None, drum_flags=None)
+- write_multitrack_midi_fast(parts, bpm, out_path, programs=None, drum_flags=None, ticks_per_beat=480)
 
 Notes:
 - All times are expressed in BEATS in the input events and converted to seconds via 60/bpm.
@@ -11,10 +12,14 @@ Notes:
 - For drums, pass drum_flags={"drums": True} (GM mapping expected, e.g., 36 kick, 38 snare, 42 hat).
 """
 
-from typing import Dict, List, Tuple, Union, Optional
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Union, Optional
 import os
+import sys
 import time
 
+import mido
+import numpy as np
 import pretty_midi
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
@@ -25,20 +30,31 @@ NoteEvent = Tuple[Union[int, str], float, float, int]
 # ---------------------------------------------------------------------------
 def _safe_pm_write(pm: pretty_midi.PrettyMIDI, out_path: str,
                    retries: int = 3, delay: float = 0.5) -> str:
+    """Write PrettyMIDI `pm` via _safe_write; returns the path actually written."""
+    return _safe_write(pm.write, out_path, retries=retries, delay=delay)
+
+
+def _safe_write(write: Callable[[str], None], out_path: str,
+                retries: int = 3, delay: float = 0.5) -> str:
     """
-    Write PrettyMIDI `pm` to `out_path` more safely on Windows:
+    Call `write(path)` to produce `out_path` more safely on Windows:
       1) write to out_path + ".tmp"
       2) attempt to remove existing out_path (ignore failures)
       3) os.replace(tmp, out_path)
       4) retry on PermissionError
       5) fallback to timestamped filename if all retries fail
+    Elsewhere files aren't locked by readers, so `out_path` is written directly.
 
     Returns the path actually written.
     """
+    if sys.platform != "win32":
+        write(out_path)
+        return out_path
+
     tmp = out_path + ".tmp"
     for _ in range(retries):
         try:
-            pm.write(tmp)
+            write(tmp)
             if os.path.exists(out_path):
                 try:
                     os.remove(out_path)
@@ -59,7 +75,7 @@ def _safe_pm_write(pm: pretty_midi.PrettyMIDI, out_path: str,
 
     base, ext = os.path.splitext(out_path)
     alt = f"{base}.{int(time.time())}{ext}"
-    pm.write(alt)
+    write(alt)
     return alt
 
 
@@ -70,15 +86,46 @@ def _beats_to_seconds(b: float, bpm: int) -> float:
     return float(b) * (60.0 / float(bpm))
 
 
-def _add_note(instr: pretty_midi.Instrument, pitch: int, s_beats: float, e_beats: float,
-              velocity: int, bpm: int) -> None:
-    start = _beats_to_seconds(s_beats, bpm)
-    end = _beats_to_seconds(e_beats, bpm)
-    if end <= start:
-        end = start + 1e-4
-    velocity = max(1, min(int(velocity), 127))
-    note = pretty_midi.Note(velocity=velocity, pitch=int(pitch), start=start, end=end)
-    instr.notes.append(note)
+@lru_cache(maxsize=512)
+def _note_to_num(name: str) -> Optional[int]:
+    """Note name (e.g. "C#4") -> MIDI number, or None if pretty_midi can't parse it."""
+    try:
+        return int(pretty_midi.note_name_to_number(name))
+    except ValueError:
+        return None
+
+
+def _pitch_num(p: Union[int, str]) -> int:
+    """MIDI number for an event pitch; -1 marks pitches to skip."""
+    if isinstance(p, int):
+        return p
+    n = _note_to_num(p) if isinstance(p, str) else None
+    return -1 if n is None else n
+
+
+def _add_notes(instr: pretty_midi.Instrument, events: List[NoteEvent], bpm: int) -> None:
+    """Append all events to `instr`; note-name pitches are converted, unparseable ones skipped."""
+    if not events:
+        return
+    spb = _beats_to_seconds(1.0, bpm)
+    k = len(events)
+    pitches = np.fromiter((_pitch_num(ev[0]) for ev in events), dtype=np.int64, count=k)
+    starts = np.fromiter((float(ev[1]) for ev in events), dtype=np.float64, count=k)
+    ends = np.fromiter((float(ev[2]) for ev in events), dtype=np.float64, count=k)
+    vels = np.fromiter((int(ev[3]) for ev in events), dtype=np.int64, count=k)
+
+    # Beat->second scaling, min-duration fix and velocity clamp in one pass each
+    keep = pitches >= 0
+    starts = starts[keep] * spb
+    ends = ends[keep] * spb
+    ends = np.where(ends > starts, ends, starts + 1e-4)
+    vels = np.clip(vels[keep], 1, 127)
+
+    Note = pretty_midi.Note
+    instr.notes.extend(
+        Note(velocity=v, pitch=p, start=s, end=e)
+        for p, s, e, v in zip(pitches[keep].tolist(), starts.tolist(), ends.tolist(), vels.tolist())
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -93,13 +140,11 @@ def write_melody_midi(
 ) -> str:
     """
     Write a single-track MIDI from a flat list of events.
-    Non-int pitches are skipped.
+    String pitches are parsed as note names; unparseable ones are skipped.
     """
     pm = pretty_midi.PrettyMIDI()
     instr = pretty_midi.Instrument(program=int(program), name=instrument_name, is_drum=False)
-    for p, s, e, v in events:
-        if isinstance(p, int):
-            _add_note(instr, p, s, e, v, bpm)
+    _add_notes(instr, events, bpm)
     pm.instruments.append(instr)
     written = _safe_pm_write(pm, out_path)
     return written
@@ -134,12 +179,88 @@ def write_multitrack_midi(
         program = int(programs.get(name, 0)) if not is_drum else 0
         instr = pretty_midi.Instrument(program=program, name=name, is_drum=is_drum)
 
-        for p, s, e, v in events:
-            if isinstance(p, int):
-                _add_note(instr, p, s, e, v, bpm)
-            # If pitch is a string, skip (Or you can add parsing if needed)
+        # String pitches are parsed as note names (cached)
+        _add_notes(instr, events, bpm)
 
         pm.instruments.append(instr)
 
     written = _safe_pm_write(pm, out_path)
     return written
+
+
+def write_multitrack_midi_fast(
+    parts: Dict[str, List[NoteEvent]],
+    bpm: int,
+    out_path: str,
+    programs: Optional[Dict[str, int]] = None,
+    drum_flags: Optional[Dict[str, bool]] = None,
+    ticks_per_beat: int = 480,
+) -> str:
+    """
+    Same inputs as write_multitrack_midi, but writes a type-1 file with mido directly.
+
+    Events are already in beats, so ticks are just beats * ticks_per_beat (no
+    seconds round-trip); the file carries the real `bpm` as its tempo. Each part's
+    note on/off messages are sorted and delta-encoded as arrays, skipping
+    pretty_midi's per-note objects and time->tick conversion.
+
+    Returns:
+        The path actually written (may differ if fallback name used).
+    """
+    programs = programs or {}
+    drum_flags = drum_flags or {}
+    mid = mido.MidiFile(type=1, ticks_per_beat=int(ticks_per_beat))
+
+    meta = mido.MidiTrack()
+    meta.append(mido.MetaMessage("set_tempo", tempo=mido.bpm2tempo(bpm), time=0))
+    meta.append(mido.MetaMessage("time_signature", numerator=4, denominator=4, time=0))
+    mid.tracks.append(meta)
+
+    # Melodic parts take channels 0..15 in order, skipping the GM drum channel 9
+    free_channels = [c for c in range(16) if c != 9]
+    Message = mido.Message
+
+    for name, events in parts.items():
+        is_drum = bool(drum_flags.get(name, False))
+        if is_drum:
+            channel = 9
+        else:
+            channel = free_channels.pop(0) if free_channels else 0
+        track = mido.MidiTrack()
+        track.append(mido.MetaMessage("track_name", name=name, time=0))
+        if not is_drum:
+            track.append(Message("program_change", channel=channel, program=int(programs.get(name, 0)), time=0))
+
+        k = len(events)
+        if k:
+            pitches = np.fromiter((_pitch_num(ev[0]) for ev in events), dtype=np.int64, count=k)
+            starts = np.fromiter((float(ev[1]) for ev in events), dtype=np.float64, count=k)
+            ends = np.fromiter((float(ev[2]) for ev in events), dtype=np.float64, count=k)
+            vels = np.fromiter((int(ev[3]) for ev in events), dtype=np.int64, count=k)
+            keep = (pitches >= 0) & (pitches <= 127)
+            pitches = pitches[keep]
+            on = np.maximum(np.rint(starts[keep] * ticks_per_beat).astype(np.int64), 0)
+            off = np.maximum(np.rint(ends[keep] * ticks_per_beat).astype(np.int64), on + 1)
+            vels = np.clip(vels[keep], 1, 127)
+
+            # (tick, kind) order with note-offs (kind 0) before note-ons (kind 1) on a tie
+            n = len(pitches)
+            ticks = np.concatenate([off, on])
+            kinds = np.concatenate([np.zeros(n, np.int64), np.ones(n, np.int64)])
+            notes = np.concatenate([pitches, pitches])
+            velos = np.concatenate([np.zeros(n, np.int64), vels])
+            order = np.lexsort((kinds, ticks))
+            ticks = ticks[order]
+            deltas = np.diff(ticks, prepend=0)
+            for d, kd, p, v in zip(deltas.tolist(), kinds[order].tolist(),
+                                   notes[order].tolist(), velos[order].tolist()):
+                if kd:
+                    track.append(Message("note_on", channel=channel, note=p, velocity=v, time=d))
+                else:
+                    track.append(Message("note_off", channel=channel, note=p, velocity=0, time=d))
+
+        track.append(mido.MetaMessage("end_of_track", time=0))
+        mid.tracks.append(track)
+
+    written = _safe_write(mid.save, out_path)
+    return written
@@ -18,12 +18,14 @@ Outputs:
 """
 
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Union, Any
 import math
 import numpy as np
 import soundfile as sf
 
+from ..config import deep_merge
 from ..synthesis.renderer import render_events_to_array
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
@@ -40,36 +42,22 @@ DEFAULTS = {
 def _get_cfg(render_opts: Dict[str, Any] | None) -> Dict[str, Any]:
     if not render_opts:
         return DEFAULTS
-    # shallow-merge
-    cfg = dict(DEFAULTS)
-    for k, v in render_opts.items():
-        if isinstance(v, dict) and isinstance(cfg.get(k), dict):
-            merged = dict(cfg[k]); merged.update(v); cfg[k] = merged
-        else:
-            cfg[k] = v
-    # also merge per_part sub-dicts
-    if "per_part" in render_opts:
-        pp = dict(DEFAULTS["per_part"])
-        pp.update(render_opts["per_part"])
-        cfg["per_part"] = pp
-    return cfg
-
-def _pan_stereo(mono: np.ndarray, pan: float) -> np.ndarray:
+    return deep_merge(DEFAULTS, render_opts)
+
+def _pan_gains(pan: float) -> Tuple[float, float]:
     """
     Constant-power pan: pan in [0,1], 0=left, 1=right, 0.5=center.
-    Returns stereo (2, N).
+    Returns (left_gain, right_gain).
     """
     pan = float(min(max(pan, 0.0), 1.0))
     theta = pan * (math.pi / 2.0)
-    l = math.cos(theta)
-    r = math.sin(theta)
-    stereo = np.vstack([mono * l, mono * r]).astype(np.float32)
-    return stereo
+    return math.cos(theta), math.sin(theta)
 
 def _peak_normalize(stereo: np.ndarray, peak_target: float = 0.99) -> np.ndarray:
-    peak = np.max(np.abs(stereo)) if stereo.size else 0.0
+    # |peak| from the max and min reductions (no abs() copy of the mix)
+    peak = max(float(stereo.max()), -float(stereo.min())) if stereo.size else 0.0
     if peak > peak_target and peak > 0:
-        stereo = (stereo / peak * peak_target).astype(np.float32)
+        stereo *= np.float32(peak_target / peak)
     return stereo
 
 def export_stems_and_mix(
@@ -89,19 +77,29 @@ def export_stems_and_mix(
     per_part = cfg.get("per_part", {})
 
     outdir = Path(outdir)
-    outdir.mkdir(parents=True, exist_ok=True)
+    if not outdir.is_dir():
+        outdir.mkdir(parents=True, exist_ok=True)
 
     stems: Dict[str, np.ndarray] = {}
     written: Dict[str, str] = {}
 
-    # Render each part
-    for name, events in parts_events.items():
+    def _render_part(name: str) -> np.ndarray:
         pp_cfg = dict(defaults)
         pp_cfg.update(per_part.get(name, {}))
         wave = pp_cfg.get("wave", "saw")
         gain = float(pp_cfg.get("gain", 0.22))
-
-        audio = render_events_to_array(events, bpm=bpm, sr=sr, wave=wave, gain=gain)
+        return render_events_to_array(parts_events[name], bpm=bpm, sr=sr, wave=wave, gain=gain)
+
+    # Render parts concurrently: they are independent and the NumPy kernels
+    # release the GIL, so threads overlap without pickling or process spawn.
+    names = list(parts_events.keys())
+    if len(names) > 1:
+        with ThreadPoolExecutor(max_workers=len(names)) as ex:
+            rendered = list(ex.map(_render_part, names))
+    else:
+        rendered = [_render_part(n) for n in names]
+
+    for name, audio in zip(names, rendered):
         stems[name] = audio
 
         # write mono stem
@@ -112,18 +110,21 @@ def export_stems_and_mix(
     # Build stereo mix with panning
     max_len = max((len(a) for a in stems.values()), default=0)
     mix = np.zeros((2, max_len), dtype=np.float32)
+    scratch = np.empty(max_len, dtype=np.float32)
 
+    # Accumulate each panned stem in place (no padding or per-stem stereo copy)
     for name, mono in stems.items():
         pp_cfg = dict(defaults)
         pp_cfg.update(per_part.get(name, {}))
         pan = float(pp_cfg.get("pan", 0.5))
-
-        if len(mono) < max_len:
-            pad = np.zeros(max_len - len(mono), dtype=np.float32)
-            mono = np.concatenate([mono, pad])
-
-        stereo = _pan_stereo(mono, pan)
-        mix += stereo
+        l, r = _pan_gains(pan)
+
+        n = len(mono)
+        tmp = scratch[:n]
+        np.multiply(mono, np.float32(l), out=tmp)
+        np.add(mix[0, :n], tmp, out=mix[0, :n])
+        np.multiply(mono, np.float32(r), out=tmp)
+        np.add(mix[1, :n], tmp, out=mix[1, :n])
 
     # Peak-safe normalization
     mix = _peak_normalize(mix, peak_target=0.99)
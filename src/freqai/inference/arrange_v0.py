@@ -11,6 +11,8 @@ Assumptions:
 """
 from typing import Dict, List, Tuple, Union
 
+import numpy as np
+
 NoteEvent = Tuple[Union[int, str], float, float, int]
 
 # GM drum notes
@@ -20,24 +22,39 @@ CHH   = 42
 OHH   = 46
 CRASH = 49  # Crash Cymbal 1
 
-def _sec_to_beat(sec: float, bpm: int) -> float:
-    return float(sec) / (60.0 / float(bpm))
-
-def _snap_to_bar(beat: float, beats_per_bar: int = 4) -> float:
-    return round(beat / beats_per_bar) * beats_per_bar
-
-def _add_evt(events: List[NoteEvent], pitch: int, s: float, e: float, v: int):
-    events.append((int(pitch), float(s), float(max(e, s + 1e-4)), max(1, min(int(v), 127))))
-
-def _apply_dynamics_to_window(events: List[NoteEvent], start_b: float, end_b: float, scale: float) -> List[NoteEvent]:
-    out: List[NoteEvent] = []
-    for p, s, e, v in events:
-        if e <= start_b or s >= end_b:
-            out.append((p, s, e, v))
-        else:
-            nv = int(max(1, min(round(v * scale), 127)))
-            out.append((p, s, e, nv))
-    return out
+# Fill hits relative to the previous bar start: (pitch, offset_beats, length_beats, velocity)
+# Snare 16ths across beat 4 (3.0/3.25/3.5/3.75), then kick pickup on the & of 4
+_FILL_REL = (
+    (SNARE, 3.0, 0.20, 110),
+    (SNARE, 3.25, 0.20, 110),
+    (SNARE, 3.5, 0.20, 110),
+    (SNARE, 3.75, 0.20, 110),
+    (KICK, 3.5, 0.18, 115),
+)
+# Crash on the section downbeat, ring ~1.5 beats
+_CRASH_LEN, _CRASH_VEL = 1.50, 118
+
+def _apply_dynamics(events: List[NoteEvent], windows: List[Tuple[float, float, float]]) -> List[NoteEvent]:
+    """
+    Scale velocities of events overlapping each (start_b, end_b, scale) window, in order.
+    Overlap tests and rounding/clamping run as array ops; untouched events are kept as-is.
+    """
+    if not events:
+        return []
+    k = len(events)
+    starts = np.fromiter((float(ev[1]) for ev in events), dtype=np.float64, count=k)
+    ends = np.fromiter((float(ev[2]) for ev in events), dtype=np.float64, count=k)
+    vels = np.fromiter((float(ev[3]) for ev in events), dtype=np.float64, count=k)
+    touched = np.zeros(k, dtype=bool)
+    for start_b, end_b, scale in windows:
+        m = (ends > start_b) & (starts < end_b)
+        if m.any():
+            vels[m] = np.clip(np.round(vels[m] * scale), 1, 127)
+            touched |= m
+    if not touched.any():
+        return list(events)
+    return [(ev[0], ev[1], ev[2], int(v)) if t else ev
+            for ev, t, v in zip(events, touched.tolist(), vels.tolist())]
 
 def _section_gain(name: str) -> float:
     n = name.lower()
@@ -58,45 +75,44 @@ def apply_arrangement(parts: Dict[str, List[NoteEvent]], bpm: int,
     Returns updated parts with:
       - drum fills at section boundaries (except the very first section)
       - simple section-based velocity scaling for all parts
+    Fills are appended, so returned parts are not time-sorted; the MIDI writers
+    order events once at write time.
     """
     if not sections:
         return parts
 
     new = {k: v[:] for k, v in parts.items()}
     drums = new.get("drums", None)
-
-    # ---- A) Section dynamics
-    for sec in sections:
-        start_b = _sec_to_beat(float(sec.get("start", 0)), bpm)
-        end_b   = _sec_to_beat(float(sec.get("end",   0)), bpm)
-        gain = _section_gain(str(sec.get("name", "")))
-
-        for part_name in list(new.keys()):
-            evs = new[part_name]
-            # lighter touch on drums
-            g = gain if part_name in ("melody", "bass") else (0.5*gain + 0.5)
-            new[part_name] = _apply_dynamics_to_window(evs, start_b, end_b, g)
+    spb = 60.0 / float(bpm)  # seconds per beat (sec -> beat is sec / spb)
+
+    # ---- A) Section dynamics (all sections applied per part in one pass)
+    bounds = [
+        (float(sec.get("start", 0)) / spb,
+         float(sec.get("end",   0)) / spb,
+         _section_gain(str(sec.get("name", ""))))
+        for sec in sections
+    ]
+    for part_name in list(new.keys()):
+        # lighter touch on drums
+        if part_name in ("melody", "bass"):
+            windows = bounds
+        else:
+            windows = [(s, e, 0.5*gain + 0.5) for s, e, gain in bounds]
+        new[part_name] = _apply_dynamics(new[part_name], windows)
 
     # ---- B) Drum fills at section changes
     if drums is not None and len(sections) > 1:
         for i in range(1, len(sections)):
             # Section start (snap to bar)
-            start_b = _snap_to_bar(_sec_to_beat(float(sections[i]["start"]), bpm), beats_per_bar)
+            start_b = round(float(sections[i]["start"]) / spb / beats_per_bar) * beats_per_bar
             prev_bar_start = start_b - beats_per_bar
             if prev_bar_start < 0:
                 continue
 
-            # Snare 16th fill across last beat of previous bar: 4 hits on 3.0/3.25/3.5/3.75
-            for ofs in (3.0, 3.25, 3.5, 3.75):
-                t = prev_bar_start + ofs
-                _add_evt(drums, SNARE, t, t + 0.20, 110)
-
-            # Kick pickup on the & of 4 (3.5)
-            t_pick = prev_bar_start + 3.5
-            _add_evt(drums, KICK, t_pick, t_pick + 0.18, 115)
-
-            # Crash on section downbeat, ring ~1.5 beats
-            _add_evt(drums, CRASH, start_b + 0.0, start_b + 1.50, 118)
+            # Template values are already valid ints/floats: no per-hit clamping
+            drums.extend((p, prev_bar_start + ofs, prev_bar_start + ofs + ln, v)
+                         for p, ofs, ln, v in _FILL_REL)
+            drums.append((CRASH, float(start_b), start_b + _CRASH_LEN, _CRASH_VEL))
 
         new["drums"] = drums
 
@@ -18,37 +18,41 @@ SNARE = 38
 CHH = 42
 OHH = 46
 
+def _bar_template(pickup: bool) -> Tuple[Tuple[int, float, float, int], ...]:
+    """One bar as (pitch, start_ofs, end_ofs, velocity), offsets in beats from the bar start."""
+    hits = [
+        # --- Backbeat snare on beats 2 & 4 (indices 1,3) ---
+        (SNARE, 1.0, 1.25, 108),
+        (SNARE, 3.0, 3.25, 112),
+        # --- Kick on beats 1 & 3 (indices 0,2) ---
+        (KICK, 0.0, 0.25, 118),
+        (KICK, 2.0, 2.25, 112),
+    ]
+    # (Optional) small pickup before beat 3 every other bar
+    if pickup:
+        hits.append((KICK, 1.75, 1.875, 96))
+    # --- Hi-hats on 8ths across the bar (every 0.5 beat) ---
+    # Short notes so our simple renderer feels percussive enough
+    for n in range(8):  # 8x 8th-notes
+        vel = 94 if (n % 2 == 0) else 84  # slight accent on the downbeats
+        hits.append((CHH, n * 0.5, n * 0.5 + 0.25, vel))
+    # (Optional) open hat on the & of 4 to lead into next bar
+    hits.append((OHH, 3.5, 3.875, 96))
+    return tuple(hits)
+
+# Even bars plain, odd bars with the kick pickup
+_BARS = (_bar_template(False), _bar_template(True))
+
 def generate_drums_v0(anchor: List[str], beats_per_bar: int = 4) -> List[NoteEvent]:
     """
     Make a basic kit groove with length = len(anchor) bars (4/4).
     For now we ignore chord labels and just track bar count.
     """
     bars = len(anchor) if anchor else 4
-    events: List[NoteEvent] = []
-
-    for i in range(bars):
-        bar_start = i * beats_per_bar
-
-        # --- Backbeat snare on beats 2 & 4 (indices 1,3) ---
-        events.append((SNARE, float(bar_start + 1.0), float(bar_start + 1.25), 108))
-        events.append((SNARE, float(bar_start + 3.0), float(bar_start + 3.25), 112))
-
-        # --- Kick on beats 1 & 3 (indices 0,2) ---
-        events.append((KICK, float(bar_start + 0.0), float(bar_start + 0.25), 118))
-        events.append((KICK, float(bar_start + 2.0), float(bar_start + 2.25), 112))
-
-        # (Optional) small pickup before beat 3 every other bar
-        if i % 2 == 1:
-            events.append((KICK, float(bar_start + 1.75), float(bar_start + 1.875), 96))
-
-        # --- Hi-hats on 8ths across the bar (every 0.5 beat) ---
-        # Short notes so our simple renderer feels percussive enough
-        for n in range(8):  # 8x 8th-notes
-            t = bar_start + n * 0.5
-            vel = 94 if (n % 2 == 0) else 84  # slight accent on the downbeats
-            events.append((CHH, float(t), float(t + 0.25), vel))
-
-        # (Optional) open hat on the & of 4 to lead into next bar
-        events.append((OHH, float(bar_start + 3.5), float(bar_start + 3.875), 96))
-
-    return events
\ No newline at end of file
+    # Offsets are exact binary fractions, so bar_start + ofs matches per-hit arithmetic
+    return [
+        (p, float(bar_start + s), float(bar_start + e), v)
+        for i in range(bars)
+        for bar_start in (i * beats_per_bar,)
+        for p, s, e, v in _BARS[i % 2]
+    ]
@@ -3,21 +3,15 @@ Simple anchor→demo melody writer (M0).
 Takes a 4-bar chord anchor and writes one sustained root note per bar as a MIDI.
 """
 from typing import List, Tuple, Union
-import re
-from ..export.midi_export import write_melody_midi
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
 
-_ROOT_RE = re.compile(r"^([A-Ga-g](?:#|b)?)(.*)$")
+# Every root prefix the old `^([A-Ga-g](?:#|b)?)` pattern accepted -> normalized root ("bb" -> "Bb")
+_ROOT_LUT = {l + acc: l.upper() + acc for l in "ABCDEFGabcdefg" for acc in ("", "#", "b")}
 
 def _root_name(chord: str) -> str:
-    m = _ROOT_RE.match(chord.strip())
-    if not m:
-        return "C"  # fallback
-    root = m.group(1).replace("♯", "#").replace("♭", "b")
-    # Normalize to proper case like "Bb", "C#", "F"
-    root = root[0].upper() + (root[1:] if len(root) > 1 else "")
-    return root
+    c = chord.strip()
+    return _ROOT_LUT.get(c[:2]) or _ROOT_LUT.get(c[:1], "C")  # "C" fallback
 
 def anchor_to_demo_melody(anchor: List[str], beats_per_bar: int = 4, octave: int = 3) -> List[NoteEvent]:
     """Map each chord to a sustained root note for one bar."""
@@ -33,6 +27,9 @@ def anchor_to_demo_melody(anchor: List[str], beats_per_bar: int = 4, octave: int
     return events
 
 def write_anchor_demo_midi(anchor: List[str], bpm: int, out_path: str) -> str:
+    # Lazy: importing freqai.inference must not pull in pretty_midi/mido
+    from ..export.midi_export import write_melody_midi
+
     events = anchor_to_demo_melody(anchor)
     write_melody_midi(events, bpm=bpm, out_path=out_path, instrument_name="anchor_demo", program=0)
     return out_path
\ No newline at end of file
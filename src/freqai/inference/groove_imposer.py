@@ -2,12 +2,14 @@
 Groove extraction & imposition (M0).
 - extract_groove_template(midi_path, quantize='1/16') -> {'grid': '1/16', 'offsets_ms': [..]}
 - impose_groove_on_events(events, bpm, template, max_ms=12) -> events with micro-timing applied
+- impose_groove_on_parts(parts, bpm, template, max_ms=12) -> same, for a whole parts dict in one pass
 
 'events' are (pitch, start_beat, end_beat, velocity) like our NoteEvent elsewhere.
 """
 from __future__ import annotations
 from typing import Iterable, Tuple, Union, List, Dict
-import bisect
+from functools import lru_cache
+import os
 import numpy as np
 import pretty_midi
 
@@ -27,74 +29,64 @@ def _grid_steps(quantize: str) -> int:
         raise ValueError(f"Unsupported quantize '{quantize}'. Use one of {sorted(_GRID_MAP)}")
     return _GRID_MAP[quantize]
 
-def _time_to_beat(t: float, beat_times: List[float]) -> float:
-    """Piecewise-linear time->beat using pretty_midi beat grid."""
-    if not beat_times:
-        return 0.0
-    if t <= beat_times[0]:
-        # extrapolate before first beat
-        if len(beat_times) >= 2:
-            sec_per_beat = beat_times[1] - beat_times[0]
-        else:
-            sec_per_beat = 60.0 / 120.0
-        return (t - beat_times[0]) / max(sec_per_beat, 1e-9)
-    i = bisect.bisect_right(beat_times, t) - 1
-    i = max(0, min(i, len(beat_times) - 2))
-    sec_per_beat = beat_times[i + 1] - beat_times[i]
-    frac = (t - beat_times[i]) / max(sec_per_beat, 1e-9)
-    return i + frac
-
-def _local_spb(beat_idx: int, beat_times: List[float]) -> float:
-    """Seconds per beat around beat_idx."""
-    i = max(0, min(beat_idx, len(beat_times) - 2))
-    return max(beat_times[i + 1] - beat_times[i], 1e-9)
+def _times_to_beats(t: np.ndarray, beat_times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Piecewise-linear time->beat using pretty_midi beat grid (needs >= 2 beats).
+    Onsets before the first beat extrapolate with the first beat's spacing.
+    Returns (continuous beats, seconds per beat at each beat's integer part).
+    """
+    last = len(beat_times) - 2
+    spbs = np.maximum(np.diff(beat_times), 1e-9)
+    i = np.clip(np.searchsorted(beat_times, t, side="right") - 1, 0, last)
+    b = i + (t - beat_times[i]) / spbs[i]
+    # local seconds per beat around int(b) (truncated, like int())
+    base = np.clip(np.trunc(b).astype(np.int64), 0, last)
+    return b, spbs[base]
 
 def extract_groove_template(midi_path: str, quantize: str = "1/16") -> Dict[str, object]:
     """
     Build average micro-timing offsets (in milliseconds) for each grid slot in a beat.
     Works on any notes it finds (drums or pitched). For a 1-bar loop this is ideal.
+
+    Results are memoized per (path, mtime, quantize), so re-extracting the same
+    loop skips MIDI parsing; editing the file invalidates the entry.
     """
+    path = str(midi_path)
+    tpl = _extract_groove_template_cached(path, os.path.getmtime(path), quantize)
+    return {"grid": tpl["grid"], "offsets_ms": list(tpl["offsets_ms"])}
+
+@lru_cache(maxsize=32)
+def _extract_groove_template_cached(midi_path: str, mtime: float, quantize: str) -> Dict[str, object]:
     steps = _grid_steps(quantize)
     pm = pretty_midi.PrettyMIDI(midi_path)
-    beat_times = pm.get_beats().tolist()
+    beat_times = pm.get_beats()
     if len(beat_times) < 2:
         # Fallback tempo estimate if no beats detected
         tempo = pm.estimate_tempo()
         # fabricate a short beat grid
-        start = 0.0
-        beat_times = [start + i * (60.0 / max(tempo, 1e-3)) for i in range(128)]
+        beat_times = np.arange(128, dtype=np.float64) * (60.0 / max(tempo, 1e-3))
 
     # Collect all note-on times
-    onsets = []
-    for inst in pm.instruments:
-        for note in inst.notes:
-            onsets.append(note.start)
-    if not onsets:
+    onsets = np.fromiter((note.start for inst in pm.instruments for note in inst.notes),
+                         dtype=np.float64)
+    if not onsets.size:
         # No notes? return zero offsets
         return {"grid": quantize, "offsets_ms": [0.0] * steps}
 
-    # Compute offsets for each onset relative to nearest gridpoint
-    per_slot_offsets = [[] for _ in range(steps)]
-    for t in onsets:
-        b = _time_to_beat(t, beat_times)  # continuous beat
-        # nearest gridpoint in units of beats
-        g = round(b * steps) / steps
-        # local seconds per beat at this region
-        base_beat = int(b)
-        spb = _local_spb(base_beat, beat_times)
-        # offset in ms (actual - ideal)
-        offset_ms = (b - g) * spb * 1000.0
-        # slot index within a beat (0..steps-1)
-        slot = int(round((b % 1.0) * steps)) % steps
-        per_slot_offsets[slot].append(offset_ms)
-
-    # Aggregate (median) and clamp to reasonable human range
-    offsets_ms = []
-    for lst in per_slot_offsets:
-        if lst:
-            offsets_ms.append(float(np.median(lst)))
-        else:
-            offsets_ms.append(0.0)
+    # Offsets (actual - nearest gridpoint, in ms) and slot within a beat, for all onsets at once
+    b, spb = _times_to_beats(onsets, np.asarray(beat_times, dtype=np.float64))
+    g = np.round(b * steps) / steps
+    offset_ms = (b - g) * spb * 1000.0
+    slots = np.rint(np.mod(b, 1.0) * steps).astype(np.int64) % steps
+
+    # Median per slot over slot-sorted runs (empty slots -> 0.0)
+    order = np.argsort(slots, kind="stable")
+    sorted_off = offset_ms[order]
+    bounds = np.searchsorted(slots[order], np.arange(steps + 1)).tolist()
+    offsets_ms = [
+        float(np.median(sorted_off[lo:hi])) if hi > lo else 0.0
+        for lo, hi in zip(bounds[:-1], bounds[1:])
+    ]
 
     return {"grid": quantize, "offsets_ms": offsets_ms}
 
@@ -110,18 +102,46 @@ def impose_groove_on_events(
     """
     quantize = str(template.get("grid", "1/16"))
     steps = _grid_steps(quantize)
-    offsets_ms: List[float] = list(template.get("offsets_ms", [0.0] * steps))
+    offsets_ms = np.asarray(template.get("offsets_ms", [0.0] * steps), dtype=np.float64)
     # Clamp offsets to +-max_ms
-    offsets_ms = [float(np.clip(v, -abs(max_ms), abs(max_ms))) for v in offsets_ms]
+    offsets_ms = np.clip(offsets_ms, -abs(max_ms), abs(max_ms))
+
+    ev = list(events)
+    if not ev:
+        return []
 
     spb = 60.0 / float(bpm)  # seconds per beat
 
-    out: List[NoteEvent] = []
-    for pitch, s_beat, e_beat, vel in events:
-        slot = int(round((s_beat % 1.0) * steps)) % steps
-        shift_beats = (offsets_ms[slot] / 1000.0) / spb
-        new_start = s_beat + shift_beats
-        dur = max(e_beat - s_beat, 1e-4)
-        new_end = new_start + dur
-        out.append((pitch, new_start, new_end, vel))
-    return out
\ No newline at end of file
+    # Resolve every onset's grid slot and shift in one gather
+    starts = np.fromiter((e[1] for e in ev), dtype=np.float64, count=len(ev))
+    ends = np.fromiter((e[2] for e in ev), dtype=np.float64, count=len(ev))
+    slots = np.rint((starts % 1.0) * steps).astype(np.int64) % steps
+    new_starts = starts + (offsets_ms[slots] / 1000.0) / spb
+    new_ends = new_starts + np.maximum(ends - starts, 1e-4)
+
+    return [
+        (pitch, ns, ne, vel)
+        for (pitch, _, _, vel), ns, ne in zip(ev, new_starts.tolist(), new_ends.tolist())
+    ]
+
+def impose_groove_on_parts(
+    parts: Dict[str, List[NoteEvent]],
+    bpm: int,
+    template: Dict[str, object],
+    max_ms: float = 12.0,
+) -> Dict[str, List[NoteEvent]]:
+    """
+    Apply impose_groove_on_events to every part with a single vectorized pass
+    over all events, then split the result back per part. Returns a NEW dict.
+    """
+    names = list(parts.keys())
+    flat = [e for name in names for e in parts[name]]
+    shifted = impose_groove_on_events(flat, bpm=bpm, template=template, max_ms=max_ms)
+
+    out: Dict[str, List[NoteEvent]] = {}
+    i = 0
+    for name in names:
+        n = len(parts[name])
+        out[name] = shifted[i:i + n]
+        i += n
+    return out
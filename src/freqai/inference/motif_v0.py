@@ -12,6 +12,7 @@ Assumptions:
 """
 
 from __future__ import annotations
+from bisect import bisect_right
 from typing import Dict, List, Tuple, Union, Iterable
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
@@ -29,17 +30,11 @@ def _clip_evt(evt: NoteEvent, start_b: float, end_b: float) -> List[NoteEvent]:
         return []
     return [(p, s2, e2, v)]
 
-def _remove_range(events: List[NoteEvent], start_b: float, end_b: float) -> List[NoteEvent]:
-    out: List[NoteEvent] = []
-    for ev in events:
-        p, s, e, v = ev
-        # keep events fully outside the window
-        if e <= start_b or s >= end_b:
-            out.append(ev)
-        else:
-            # if overlapping, drop it (simple replace policy)
-            pass
-    return out
+def _overlaps_any(s: float, e: float, w_starts: List[float], w_ends: List[float]) -> bool:
+    """True if [s, e) overlaps any window; windows sorted by start (ends then sorted too)."""
+    # Windows ending after s form a suffix; the earliest-starting of them decides
+    i = bisect_right(w_ends, s)
+    return i < len(w_starts) and w_starts[i] < e
 
 def apply_motif_repetition(
     parts: Dict[str, List[NoteEvent]],
@@ -87,14 +82,22 @@ def apply_motif_repetition(
     if not target_starts_b:
         return parts
 
-    # Replace melody in those windows with the cloned motif
-    new_melody = melody[:]
-    for tgt_b in target_starts_b:
-        window_start = tgt_b
-        window_end = tgt_b + motif_len_b
-        new_melody = _remove_range(new_melody, window_start, window_end)
+    # Replace melody in those windows with the cloned motif (simple replace policy:
+    # overlapping events are dropped). Each target clears its window, including
+    # clones placed by earlier targets, then appends its own clones; survival is
+    # decided per event directly instead of re-filtering the whole list per target.
+    windows = [(tgt_b, tgt_b + motif_len_b) for tgt_b in target_starts_b]
+    ordered = sorted(windows)
+    w_starts = [w[0] for w in ordered]
+    w_ends = [w[1] for w in ordered]
+    new_melody = [ev for ev in melody if not _overlaps_any(ev[1], ev[2], w_starts, w_ends)]
+    for i, (tgt_b, _) in enumerate(windows):
         dt = tgt_b - motif_start_b
-        new_melody.extend([_clone_evt(ev, dt) for ev in motif_events])
+        later = windows[i + 1:]
+        for ev in motif_events:
+            c = _clone_evt(ev, dt)
+            if not any(c[2] > ws and c[1] < we for ws, we in later):
+                new_melody.append(c)
 
     # Keep ordering tidy
     new_melody.sort(key=lambda ev: (ev[1], ev[2], ev[0] if isinstance(ev[0], int) else 0))
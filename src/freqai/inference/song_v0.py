@@ -25,8 +25,8 @@ def _tile_anchor(anchor: List[str], total_bars: int) -> List[str]:
     """Repeat the anchor progression to match total_bars."""
     if not anchor:
         return []
-    tiled = [anchor[i % len(anchor)] for i in range(total_bars)]
-    return tiled
+    reps = -(-total_bars // len(anchor))  # ceil division
+    return (anchor * reps)[:total_bars]
 
 def generate_song_v0(
     anchor: List[str],
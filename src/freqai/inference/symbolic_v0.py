@@ -7,10 +7,10 @@ symbolic_v0: simple, deterministic melody+bass generator.
 """
 
 from __future__ import annotations
+from functools import lru_cache
 from typing import List, Tuple, Union, Dict
 import re
 import math
-import pretty_midi
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
 
@@ -27,10 +27,24 @@ MODE_INTERVALS: Dict[str, List[int]] = {
 
 _CHORD_RE = re.compile(r"^([A-Ga-g](?:#|b)?)(.*)$")
 
-def _pc(note_name: str) -> int:
-    """Pitch class (0..11) using pretty_midi for robust spelling."""
-    return pretty_midi.note_name_to_number(note_name.replace("♯","#").replace("♭","b")+"4") % 12
+# Letter (either case) + optional single '#'/'b' -> pitch class; same result as pretty_midi
+_PC_TABLE: Dict[str, int] = {
+    l + acc: (pc + ofs) % 12
+    for letter, pc in zip("CDEFGAB", (0, 2, 4, 5, 7, 9, 11))
+    for l in (letter, letter.lower())
+    for acc, ofs in (("", 0), ("#", 1), ("b", -1))
+}
 
+def _pc(note_name: str) -> int:
+    """Pitch class (0..11): table lookup, pretty_midi for any other spelling."""
+    n = note_name.replace("♯","#").replace("♭","b")
+    pc = _PC_TABLE.get(n)
+    if pc is None:
+        import pretty_midi  # rare spellings only; keeps the module import light
+        pc = pretty_midi.note_name_to_number(n+"4") % 12
+    return pc
+
+@lru_cache(maxsize=512)
 def _parse_chord(ch: str) -> Tuple[int, str]:
     """Return (root_pc, quality) with quality in {'maj','min','dim','aug'} (best-effort)."""
     m = _CHORD_RE.match(ch.strip())
@@ -59,13 +73,16 @@ def _scale_pcs(key: str, mode: str) -> List[int]:
 
 def _closest_pitch_in_pc(target: int, pc_set: List[int], lo: int, hi: int) -> int:
     """Pick pitch (MIDI number) within [lo,hi] whose pitch-class is in pc_set and nearest to target."""
+    # Per pitch class only a few pitches can win: the nearest one on each side of
+    # target, or the first/last in range when target lies outside [lo,hi].
+    # Ties go to the lower pitch, as with an ascending scan.
     best = None
-    best_d = 10**9
-    for p in range(lo, hi+1):
-        if p % 12 in pc_set:
-            d = abs(p - target)
-            if d < best_d:
-                best_d = d
+    for pc in pc_set:
+        if not 0 <= pc < 12:
+            continue  # never matches p % 12
+        below = target - ((target - pc) % 12)
+        for p in (below, below + 12, lo + (pc - lo) % 12, hi - (hi - pc) % 12):
+            if lo <= p <= hi and (best is None or (abs(p - target), p) < (abs(best - target), best)):
                 best = p
     if best is None:
         # fallback: clamp target to range
@@ -74,8 +91,32 @@ def _closest_pitch_in_pc(target: int, pc_set: List[int], lo: int, hi: int) -> in
 
 def _name(p: int) -> str:
     """Prefer returning MIDI int (our exporter accepts ints); kept for debugging if needed."""
+    import pretty_midi
     return pretty_midi.note_number_to_name(p)
 
+def _chord_voicing(
+    ch: str,
+    melody_register: Tuple[int,int],
+    bass_register: Tuple[int,int],
+) -> Tuple[int, int, int, int, int]:
+    """Return (root, third, fifth) in the melody register and (root, fifth) in the bass register."""
+    melody_lo, melody_hi = melody_register
+    bass_lo, bass_hi = bass_register
+    r_pc, qual = _parse_chord(ch)
+    triad = _triad_pcs(r_pc, qual)
+
+    # Choose a bar center reference: chord root near middle of melody register
+    center = (melody_lo + melody_hi) // 2
+    root_pitch = _closest_pitch_in_pc(center, [r_pc], melody_lo, melody_hi)
+    third_pitch = _closest_pitch_in_pc(root_pitch + 3 if qual in ("min","dim") else root_pitch + 4,
+                                       [triad[1] if len(triad)>1 else ((r_pc+4)%12)], melody_lo, melody_hi)
+    fifth_pitch = _closest_pitch_in_pc(root_pitch + 7, [triad[2] if len(triad)>2 else ((r_pc+7)%12)], melody_lo, melody_hi)
+
+    # Root in bass register
+    bass_root = _closest_pitch_in_pc((bass_lo + bass_hi)//2, [r_pc], bass_lo, bass_hi)
+    bass_fifth = _closest_pitch_in_pc(bass_root + 7, [ (r_pc + 7) % 12 ], bass_lo, bass_hi)
+    return root_pitch, third_pitch, fifth_pitch, bass_root, bass_fifth
+
 def generate_melody_bass(
     anchor: List[str],
     key: str,
@@ -93,23 +134,23 @@ def generate_melody_bass(
         return {"melody": [], "bass": []}
 
     scale = _scale_pcs(key, mode)
+    # pitch class -> first scale degree index (for stepwise weak-beat moves)
+    pc_to_idx: Dict[int, int] = {}
+    for j, pc in enumerate(scale):
+        pc_to_idx.setdefault(pc, j)
     melody_lo, melody_hi = melody_register
-    bass_lo, bass_hi = bass_register
 
     melody: List[NoteEvent] = []
     bass: List[NoteEvent] = []
 
+    # A tiled anchor repeats the same few chords; resolve each symbol once
+    voicings: Dict[str, Tuple[int, int, int, int, int]] = {}
+
     prev_m = None  # previous melody MIDI
     for i, ch in enumerate(anchor):
-        r_pc, qual = _parse_chord(ch)
-        triad = _triad_pcs(r_pc, qual)
-
-        # Choose a bar center reference: chord root near middle of melody register
-        center = (melody_lo + melody_hi) // 2
-        root_pitch = _closest_pitch_in_pc(center, [r_pc], melody_lo, melody_hi)
-        third_pitch = _closest_pitch_in_pc(root_pitch + 3 if qual in ("min","dim") else root_pitch + 4,
-                                           [triad[1] if len(triad)>1 else ((r_pc+4)%12)], melody_lo, melody_hi)
-        fifth_pitch = _closest_pitch_in_pc(root_pitch + 7, [triad[2] if len(triad)>2 else ((r_pc+7)%12)], melody_lo, melody_hi)
+        if ch not in voicings:
+            voicings[ch] = _chord_voicing(ch, melody_register, bass_register)
+        root_pitch, third_pitch, fifth_pitch, bass_root, bass_fifth = voicings[ch]
 
         # Strong beats: 0 and 2 -> alternate root, third/fifth for contour
         strong_targets = [root_pitch, third_pitch if (i % 2 == 0) else fifth_pitch]
@@ -122,15 +163,12 @@ def generate_melody_bass(
             else:  # weak: pick a scale tone within a step or two of last
                 last = beat_notes[-1] if beat_notes else (prev_m if prev_m is not None else root_pitch)
                 # try up or down by 1–2 scale steps
-                candidates_pcs = []
-                for k in (-2,-1,1,2):
-                    idxs = [j for j,pc in enumerate(scale) if pc == (last % 12)]
-                    if idxs:
-                        j0 = idxs[0]
-                        cand_pc = scale[(j0 + k) % len(scale)]
-                        candidates_pcs.append(cand_pc)
-                # ensure uniqueness
-                candidates_pcs = list(dict.fromkeys(candidates_pcs))
+                j0 = pc_to_idx.get(last % 12)
+                if j0 is None:
+                    candidates_pcs = []
+                else:
+                    # ensure uniqueness (short scales can wrap onto the same degree)
+                    candidates_pcs = list(dict.fromkeys(scale[(j0 + k) % len(scale)] for k in (-2,-1,1,2)))
                 # choose closest pitch class candidate
                 choices = [_closest_pitch_in_pc(last, [pc], melody_lo, melody_hi) for pc in candidates_pcs]
                 # break ties by closeness to root_pitch (keeps phrase centered)
@@ -147,9 +185,6 @@ def generate_melody_bass(
             melody.append((int(p), float(bar_start + b), float(bar_start + b + 1), 96 if b % 2 == 0 else 84))
 
         # Bass: half notes root -> fifth
-        # Root in bass register
-        bass_root = _closest_pitch_in_pc((bass_lo + bass_hi)//2, [r_pc], bass_lo, bass_hi)
-        bass_fifth = _closest_pitch_in_pc(bass_root + 7, [ (r_pc + 7) % 12 ], bass_lo, bass_hi)
         bass.append((int(bass_root), float(bar_start + 0), float(bar_start + 2), 104))
         bass.append((int(bass_fifth), float(bar_start + 2), float(bar_start + 4), 104))
 
@@ -10,6 +10,7 @@ NoteEvent = (pitch: int|str, start_beat: float, end_beat: float, velocity: int)
 """
 
 from __future__ import annotations
+from functools import lru_cache
 from typing import Dict, List, Tuple, Union
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
@@ -49,6 +50,7 @@ def _scale_pcs_for_key_mode(key: str, mode: str) -> List[int]:
     degrees = MODE_PCS.get(mode.lower(), MODE_PCS["ionian"])
     return [ (root + d) % 12 for d in degrees ]
 
+@lru_cache(maxsize=512)
 def _parse_chord(ch: str) -> Tuple[int, str]:
     """
     Accepts things like 'Am', 'Amin', 'A', 'C', 'G7' -> treat '7' as major triad base.
@@ -129,12 +131,18 @@ def improve_voice_leading(
         return parts
 
     # Precompute chord tone pcs per bar
+    # (tiled anchors repeat a few chords, so parse each distinct symbol once)
+    tones_by_chord: Dict[str, List[int]] = {}
     chord_pcs_by_bar: List[List[int]] = []
     for ch in anchor:
-        r, q = _parse_chord(ch)
-        chord_pcs_by_bar.append(_chord_tones(r, q))
+        if ch not in tones_by_chord:
+            r, q = _parse_chord(ch)
+            tones_by_chord[ch] = _chord_tones(r, q)
+        chord_pcs_by_bar.append(tones_by_chord[ch])
 
     scale_pcs = _scale_pcs_for_key_mode(key, mode)
+    # Weak-beat drift target depends only on prev % 12: resolve all 12 once
+    drift_pc = [min(scale_pcs, key=lambda pc: min((abs(x - pc), 12-abs(x - pc)))) for x in range(12)]
 
     out: Dict[str, List[NoteEvent]] = {k: v[:] for k, v in parts.items()}
 
@@ -162,8 +170,7 @@ def improve_voice_leading(
                     tgt = _nearest_pc_pitch(prev, chord_pcs, bass_lo, bass_hi)
                 else:
                     # keep within range, optionally drift a step toward nearest scale tone
-                    target_pc = min(scale_pcs, key=lambda pc: min((abs((prev % 12) - pc), 12-abs((prev % 12) - pc))))
-                    tgt = _nearest_pc_pitch(prev, [target_pc], bass_lo, bass_hi)
+                    tgt = _nearest_pc_pitch(prev, [drift_pc[prev % 12]], bass_lo, bass_hi)
             prev = tgt
             new_bass.append((tgt, s, e, v))
         out["bass"] = new_bass
@@ -1,14 +1,19 @@
 from __future__ import annotations
-from typing import Iterable, Tuple, Union, Dict
+from functools import lru_cache
+from typing import Callable, Iterable, List, Tuple, Union, Dict
 from pathlib import Path
 import numpy as np
 import soundfile as sf
-import pretty_midi
 
 NoteEvent = Tuple[Union[int, str], float, float, int]
 
+@lru_cache(maxsize=512)
+def _note_name_to_midi(n: str) -> int:
+    import pretty_midi  # only needed for note-name pitches
+    return int(pretty_midi.note_name_to_number(n))
+
 def _note_to_midi(n: Union[int, str]) -> int:
-    return int(pretty_midi.note_name_to_number(n)) if isinstance(n, str) else int(n)
+    return _note_name_to_midi(n) if isinstance(n, str) else int(n)
 
 def _midi_to_freq(m: int) -> float:
     return 440.0 * (2.0 ** ((m - 69) / 12.0))
@@ -24,18 +29,74 @@ def _adsr(n: int, sr: int, a=0.005, d=0.05, s=0.85, r=0.05):
         env[rs:] = np.linspace(env[rs], 0.0, n - rs, dtype=np.float32)
     return env
 
-def _osc(wave: str, f: float, t: np.ndarray) -> np.ndarray:
-    ph = 2*np.pi*f*t
-    if wave == "sine":    return np.sin(ph, dtype=np.float32)
-    if wave == "square":  return np.sign(np.sin(ph)).astype(np.float32)
-    if wave == "triangle":
-        frac = (f*t) % 1.0
-        return (2*np.abs(2*frac - 1) - 1).astype(np.float32)
-    if wave == "saw":
-        frac = (f*t) % 1.0
-        return (2*frac - 1).astype(np.float32)
+@lru_cache(maxsize=256)
+def _adsr_cached(n: int, sr: int, **adsr) -> np.ndarray:
+    # Notes share a handful of lengths: reuse one read-only envelope per (n, sr, adsr)
+    env = _adsr(n, sr, **adsr)
+    env.flags.writeable = False
+    return env
+
+# Oscillators take `f` as a scalar (-> (n,)) or a (k, 1) column of notes (-> (k, n))
+Freq = Union[float, np.ndarray]
+
+def _cycles(f: Freq, n: int, sr: int) -> np.ndarray:
+    # Phase in cycles for the whole note at once (no per-sample Python work)
+    return np.arange(n, dtype=np.float64) * (f / sr)
+
+def _wrapped(f: Freq, n: int, sr: int) -> np.ndarray:
+    # Branchless phase wrap: x - floor(x) avoids NumPy's fmod-style remainder
+    cyc = _cycles(f, n, sr)
+    return np.subtract(cyc, np.floor(cyc), out=cyc)
+
+# Kernels reuse the float64 phase buffer in place and cast to float32 once at the end
+
+def _osc_sine(f: Freq, n: int, sr: int) -> np.ndarray:
+    ph = _cycles(f, n, sr)
+    ph *= 2*np.pi
+    return np.sin(ph, out=ph).astype(np.float32)
+
+def _osc_square(f: Freq, n: int, sr: int) -> np.ndarray:
+    return np.where(_wrapped(f, n, sr) < 0.5, np.float32(1.0), np.float32(-1.0))
+
+def _osc_triangle(f: Freq, n: int, sr: int) -> np.ndarray:
+    w = _wrapped(f, n, sr)
+    w *= 2; w -= 1
+    np.abs(w, out=w)
+    w *= 2; w -= 1
+    return w.astype(np.float32)
+
+def _osc_saw(f: Freq, n: int, sr: int) -> np.ndarray:
+    w = _wrapped(f, n, sr)
+    w *= 2; w -= 1
+    return w.astype(np.float32)
+
+def _osc_noise(f: Freq, n: int, sr: int) -> np.ndarray:
+    # Fixed seed: every note gets the same noise burst
     rng = np.random.default_rng(42)
-    return rng.uniform(-1, 1, t.shape).astype(np.float32)
+    row = rng.uniform(-1, 1, n).astype(np.float32)
+    return np.tile(row, (len(f), 1)) if np.ndim(f) else row
+
+# Waveform -> kernel; resolved once per render call, not per note/sample
+_OSCILLATORS: Dict[str, Callable[[Freq, int, int], np.ndarray]] = {
+    "sine": _osc_sine,
+    "square": _osc_square,
+    "triangle": _osc_triangle,
+    "saw": _osc_saw,
+    "noise": _osc_noise,
+}
+
+# Cap on samples per synthesized (k, L) block: peak ~12 MB (8 MB float64 phase
+# buffer plus its 4 MB float32 cast)
+_BLOCK_SAMPLES = 1 << 20
+
+def _events_to_arrays(ev: List[NoteEvent]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Split NoteEvents into parallel (midi, start_beat, end_beat, velocity) arrays."""
+    k = len(ev)
+    midi = np.fromiter((_note_to_midi(e[0]) for e in ev), dtype=np.float64, count=k)
+    starts = np.fromiter((float(e[1]) for e in ev), dtype=np.float64, count=k)
+    ends = np.fromiter((float(e[2]) for e in ev), dtype=np.float64, count=k)
+    vels = np.fromiter((int(e[3]) for e in ev), dtype=np.float64, count=k)
+    return midi, starts, ends, vels
 
 def render_events_to_array(
     events: Iterable[NoteEvent], bpm: int, sr: int = 44100,
@@ -44,21 +105,46 @@ def render_events_to_array(
     spb = 60.0 / float(bpm)
     ev = list(events)
     if not ev: return np.zeros(1, np.float32)
-    total_sec = max(float(e[2]) for e in ev) * spb
+    midi, sb, eb, vel = _events_to_arrays(ev)
+    total_sec = float(eb.max()) * spb
     n = int(np.ceil(total_sec * sr)) + 1
     out = np.zeros(n, np.float32)
     if adsr is None: adsr = {"a":0.005,"d":0.05,"s":0.85,"r":0.05}
-    for pitch, sb, eb, vel in ev:
-        f = _midi_to_freq(_note_to_midi(pitch))
-        s_sec, e_sec = float(sb)*spb, float(eb)*spb
-        e_sec = max(e_sec, s_sec + 1e-3)
-        s_idx, e_idx = int(s_sec*sr), min(int(np.ceil(e_sec*sr)), n)
-        t = np.arange(e_idx - s_idx, dtype=np.float32) / sr
-        seg = _osc(wave, f, t) * _adsr(len(t), sr, **adsr)
-        seg = (gain * (max(1, min(int(vel),127))/127.0) * seg).astype(np.float32)
-        out[s_idx:e_idx] += seg
-    peak = np.max(np.abs(out))
-    return out if peak <= 0.99 else (out/peak*0.99).astype(np.float32)
+    osc = _OSCILLATORS.get(wave, _osc_noise)
+
+    # Per-note frequency, sample span and amplitude, computed for all notes at once
+    freqs = 440.0 * (2.0 ** ((midi - 69.0) / 12.0))
+    s_sec = sb * spb
+    e_sec = np.maximum(eb * spb, s_sec + 1e-3)
+    s_idx = (s_sec * sr).astype(np.int64)
+    e_idx = np.minimum(np.ceil(e_sec * sr).astype(np.int64), n)
+    amps = gain * (np.clip(vel, 1, 127) / 127.0)
+
+    # Notes of equal sample length are synthesized together, and each distinct
+    # (pitch, length) waveform only once: (k, L) blocks of unique frequencies get
+    # one oscillator/envelope pass, then every note adds its gain-scaled copy
+    lengths = e_idx - s_idx
+    # Empty spans (e.g. clipped at the buffer end) and zero-gain notes add nothing
+    audible = (lengths > 0) & (amps != 0)
+    for m in np.unique(lengths[audible]).tolist():
+        env = _adsr_cached(m, sr, **adsr)
+        rows = np.flatnonzero(audible & (lengths == m))
+        uniq_f, which = np.unique(freqs[rows], return_inverse=True)
+        note_amps = amps[rows].astype(np.float32)
+        scratch = np.empty(m, np.float32)
+        step = max(1, _BLOCK_SAMPLES // m)
+        for b in range(0, len(uniq_f), step):
+            base = osc(uniq_f[b:b + step][:, None], m, sr)
+            base *= env
+            sel = np.flatnonzero((which >= b) & (which < b + step))
+            for j, si, amp in zip((which[sel] - b).tolist(), s_idx[rows[sel]].tolist(), note_amps[sel].tolist()):
+                np.multiply(base[j], np.float32(amp), out=scratch)
+                out[si:si + m] += scratch
+    # Peak-safe normalization in place; peak from max/min avoids an abs() copy
+    peak = max(float(out.max()), -float(out.min()))
+    if peak > 0.99:
+        out *= np.float32(0.99 / peak)
+    return out
 
 def write_wav_from_events(events, bpm, out_path: str | Path, sr=44100, wave="saw", gain=0.22, adsr=None) -> str:
     audio = render_events_to_array(events, bpm=bpm, sr=sr, wave=wave, gain=gain, adsr=adsr)